@@ -4,6 +4,7 @@ import pandas as pd
 import numpy_financial as npf
 import numpy as np
 import requests
+import io
 from datetime import date, timedelta
 import datetime
 import json
@@ -143,6 +144,187 @@ def get_asset_details(ticker):
     except:
         return {"isin": "N/A", "long_name": None}
 
+# --- EXPORT-FUNKTIONEN ---
+EXPORT_CHUNK_ROWS = 5000
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Excel (XLSX)": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+def _iter_chunks(columns):
+    # Liefert Spalten-Slices (Views auf die Arrays), damit nie die ganze Tabelle als Kopie entsteht
+    n_rows = len(next(iter(columns.values()))) if columns else 0
+    for start in range(0, n_rows, EXPORT_CHUNK_ROWS):
+        stop = min(start + EXPORT_CHUNK_ROWS, n_rows)
+        yield {name: values[start:stop] for name, values in columns.items()}
+
+def _write_csv(columns):
+    buf = io.BytesIO()
+    # Direkt als Bytes schreiben (keine zweite Kopie), BOM damit Excel Umlaute korrekt erkennt
+    text = io.TextIOWrapper(buf, encoding="utf-8-sig", newline="")
+    header_written = False
+    for chunk in _iter_chunks(columns):
+        pd.DataFrame(chunk, copy=False).to_csv(text, index=False, header=not header_written, date_format="%Y-%m-%d")
+        header_written = True
+    if not header_written:
+        text.write(",".join(columns.keys()) + "\n")
+    text.flush()
+    text.detach()
+    return buf.getvalue()
+
+def _write_parquet(columns):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.table({name: values[:1] for name, values in columns.items()}).schema
+    buf = io.BytesIO()
+    with pq.ParquetWriter(buf, schema) as writer:
+        for chunk in _iter_chunks(columns):
+            writer.write_table(pa.table(chunk, schema=schema))
+    return buf.getvalue()
+
+def _write_xlsx(columns, sheet_name):
+    import xlsxwriter
+
+    buf = io.BytesIO()
+    # constant_memory schreibt Zeile für Zeile auf die Platte statt das ganze Blatt im RAM zu halten
+    workbook = xlsxwriter.Workbook(buf, {
+        "constant_memory": True,
+        "nan_inf_to_errors": True,
+        "default_date_format": "dd.mm.yyyy",
+    })
+    sheet = workbook.add_worksheet(sheet_name[:31])
+    sheet.write_row(0, 0, list(columns.keys()))
+    row = 1
+    for chunk in _iter_chunks(columns):
+        chunk_cols = [
+            values.astype("datetime64[us]").tolist() if np.issubdtype(values.dtype, np.datetime64) else values.tolist()
+            for values in chunk.values()
+        ]
+        for values in zip(*chunk_cols):
+            sheet.write_row(row, 0, values)
+            row += 1
+    workbook.close()
+    return buf.getvalue()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_export_file(table_name, file_format, columns):
+    # Die Spalten (monatlich, wenige hundert Zeilen) werden mitgehasht, der Cache passt daher immer zu den Daten
+    if file_format == "CSV":
+        return _write_csv(columns)
+    if file_format == "Parquet":
+        return _write_parquet(columns)
+    return _write_xlsx(columns, table_name)
+
+# --- PARAMETER-SWEEP ---
+SWEEP_CHUNK_ELEMENTS = 2_000_000
+SWEEP_MAX_SCENARIOS = 500_000
+SWEEP_IRR_MAX_EXPONENT = 600.0  # (1 + r) ** t bleibt damit weit unter dem float64-Maximum
+
+def _sweep_irr_grid(n_months):
+    # Feines Raster für Monatsrenditen von ca. -22 % bis +28 %, gröber erweitert bis zu extremen Renditen
+    # (z. B. kurze Zeiträume mit Vervielfachung des Kurses), soweit die Potenzen endlich bleiben
+    core = np.linspace(-0.25, 0.25, 2001)
+    x_max = min(5.0, SWEEP_IRR_MAX_EXPONENT / max(n_months - 1, 1))
+    if x_max <= 0.25:
+        return np.expm1(core)
+    ext = np.arange(0.25, x_max, 0.005)[1:]
+    return np.expm1(np.concatenate([-ext[::-1], core, ext]))
+
+def _sweep_irr(weights, basis, rates, basis_grid, refine_steps=3):
+    # Barwert aller Szenarien auf dem Zinsraster, Nullstelle je Zeile per Regula falsi im Vorzeichenwechsel
+    irr = np.full(len(weights), np.nan)
+    mid_dist = np.abs(rates[:-1] + rates[1:]) / 2
+    months = np.arange(basis.shape[1])
+    chunk_rows = max(1, SWEEP_CHUNK_ELEMENTS // max(len(rates), len(months)))
+    for start in range(0, len(weights), chunk_rows):
+        w = weights[start:start + chunk_rows]
+        npv = w @ basis_grid
+        positive = npv > 0
+        crossing = positive[:, 1:] != positive[:, :-1]
+        # Wie npf.irr: bei mehreren Nullstellen die Rendite, die am nächsten an 0 liegt
+        j = np.where(crossing, mid_dist, np.inf).argmin(axis=1)
+        rows = np.arange(len(j))
+        found = crossing[rows, j]
+        r0, r1 = rates[j], rates[j + 1]
+        y0, y1 = npv[rows, j], npv[rows, j + 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = r0 - y0 * (r1 - r0) / (y1 - y0)
+            for _ in range(refine_steps):
+                r = np.where(found, r, 0.0)
+                y = np.einsum("ij,ij->i", w, np.exp(-np.outer(np.log1p(r), months)) @ basis.T)
+                same_side = (y > 0) == (y0 > 0)
+                r0, y0 = np.where(same_side, r, r0), np.where(same_side, y, y0)
+                r1, y1 = np.where(same_side, r1, r), np.where(same_side, y1, y)
+                r = r0 - y0 * (r1 - r0) / (y1 - y0)
+                r = np.where(np.isfinite(r), r, r0)
+        irr[start:start + len(j)] = np.where(found, r, np.nan)
+    return ((1 + irr) ** 12 - 1) * 100
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def run_parameter_sweep(prices, dividends, fee_type, fee_levels, tax_levels, rate_levels, cap_levels):
+    """Simuliert alle Kombinationen aus Gebühr x Steuer x Sparrate x Startkapital auf einem Kursverlauf.
+
+    Liefert Endkapital und IZF (p.a.) beider Strategien als Arrays der Form
+    (Gebühren, Steuersätze, Sparraten, Startkapitalien).
+    """
+    p = np.asarray(prices, dtype=np.float64)
+    d = np.asarray(dividends, dtype=np.float64)
+    n_months = len(p)
+    inv_p = np.divide(1.0, p, out=np.zeros_like(p), where=p > 0)
+
+    fee = np.asarray(fee_levels, dtype=np.float64)[:, None, None, None]
+    tax_mult = 1.0 - np.asarray(tax_levels, dtype=np.float64) / 100.0
+    tm = tax_mult[None, :, None, None]
+    rate = np.asarray(rate_levels, dtype=np.float64)[None, None, :, None]
+    cap = np.asarray(cap_levels, dtype=np.float64)[None, None, None, :]
+
+    # Netto-Investition nach Gebühr (Gebühr maximal so hoch wie die Einzahlung)
+    if fee_type == "Prozentual (%)":
+        net_cap = cap * (1.0 - np.minimum(fee / 100.0, 1.0))
+        net_rate = rate * (1.0 - np.minimum(fee / 100.0, 1.0))
+    else:
+        net_cap = np.maximum(cap - fee, 0.0)
+        net_rate = np.maximum(rate - fee, 0.0)
+
+    # Ausschüttend: Anteile sind linear in den Netto-Investitionen
+    cum_inv_p = np.concatenate(([0.0], np.cumsum(inv_p[1:])))
+    end_no = (net_cap * inv_p[0] + net_rate * cum_inv_p[-1]) * p[-1]
+
+    # Thesaurierend: jede Einzahlung wächst mit dem Produkt der späteren Reinvest-Faktoren
+    growth = 1.0 + np.outer(tax_mult, d * inv_p)
+    growth_tail = np.cumprod(growth[:, ::-1], axis=1)[:, ::-1]
+    growth_after = np.concatenate([growth_tail[:, 1:], np.ones((len(tax_mult), 1))], axis=1)
+    coef_cap = (inv_p[0] * growth_after[:, 0])[None, :, None, None]
+    coef_rate = (growth_after[:, 1:] @ inv_p[1:])[None, :, None, None]
+    end_re = (net_cap * coef_cap + net_rate * coef_rate) * p[-1]
+
+    # Cashflows als Linearkombination von 5 Basisreihen: Start, Sparrate, Dividenden aus Startkapital,
+    # Dividenden aus Sparraten, Endwert
+    basis = np.zeros((5, n_months))
+    basis[0, 0] = 1.0
+    basis[1, 1:] = 1.0
+    basis[2, 1:] = d[1:] * inv_p[0]
+    basis[3, 1:] = d[1:] * cum_inv_p[:-1]
+    basis[4, -1] = 1.0
+    irr_rates = _sweep_irr_grid(n_months)
+    basis_grid = basis @ np.exp(-np.outer(np.arange(n_months), np.log1p(irr_rates)))
+
+    shape = end_re.shape
+    def flat(a):
+        return np.broadcast_to(a, shape).ravel()
+    zeros = np.zeros(int(np.prod(shape)))
+    w_no = np.stack([-flat(cap), -flat(rate), flat(tm * net_cap), flat(tm * net_rate), flat(end_no)], axis=1)
+    w_re = np.stack([-flat(cap), -flat(rate), zeros, zeros, flat(end_re)], axis=1)
+
+    return {
+        "end_no": np.broadcast_to(end_no, shape).copy(),
+        "end_re": end_re,
+        "irr_no": _sweep_irr(w_no, basis, irr_rates, basis_grid).reshape(shape),
+        "irr_re": _sweep_irr(w_re, basis, irr_rates, basis_grid).reshape(shape),
+    }
+
 # --- LAYOUT: SUCHE & TREFFERLISTE ---
 st.markdown("---")
 col_input, col_table = st.columns([1, 2])
@@ -359,6 +541,16 @@ if selected_ticker and not hist_df.empty:
         growth_factors = []
         prev_price = None
         
+        # Spalten für den Export (Monatsjournal)
+        ledger_prices = []
+        ledger_divs_per_share = []
+        ledger_contributions = []
+        ledger_fees = []
+        ledger_divs_net_no = []
+        ledger_divs_net_re = []
+        ledger_shares_no = []
+        ledger_shares_re = []
+        
         yearly_stats = {}
 
         tax_multiplier = 1.0 - (tax_rate / 100.0)
@@ -397,6 +589,7 @@ if selected_ticker and not hist_df.empty:
 
             # --- 2. REGULÄRE INVESTITION ---
             investment_brutto = start_capital if d == df_filtered.index[0] else monthly_rate
+            current_fee = 0.0
             
             if investment_brutto > 0:
                 if fee_type == "Prozentual (%)":
@@ -428,6 +621,15 @@ if selected_ticker and not hist_df.empty:
             invested_values_brutto.append(invested_brutto)
             dates.append(d)
             
+            ledger_prices.append(price)
+            ledger_divs_per_share.append(div_per_share)
+            ledger_contributions.append(investment_brutto)
+            ledger_fees.append(current_fee)
+            ledger_divs_net_no.append(div_net_no)
+            ledger_divs_net_re.append(div_net_re)
+            ledger_shares_no.append(shares_no_reinv)
+            ledger_shares_re.append(shares_reinv)
+            
             yearly_stats[year]["End_No"] = shares_no_reinv * price
             yearly_stats[year]["End_Re"] = shares_reinv * price
             
@@ -679,3 +881,229 @@ if selected_ticker and not hist_df.empty:
                 )
             else:
                 st.info("Die gewählte Historie ist zu kurz. Für diese Auswertung werden mindestens 10 zusammenhängende Jahre benötigt.")
+
+        # =====================================================================
+        # EXPORT DER VOLLSTÄNDIGEN ERGEBNISSE
+        # =====================================================================
+        st.markdown("---")
+        st.subheader("📥 Export")
+        st.write("Exportiert die vollständigen Ergebnisse. Die Datei wird erst beim Klick erstellt und für die aktuellen Parameter zwischengespeichert.")
+
+        export_dates = df_filtered.index.to_numpy()
+        export_tables = {
+            "Monatsjournal": ("journal", {
+                "Datum": export_dates,
+                "Kurs": np.asarray(ledger_prices),
+                "Dividende je Anteil": np.asarray(ledger_divs_per_share),
+                "Einzahlung (Brutto)": np.asarray(ledger_contributions),
+                "Gebühr": np.asarray(ledger_fees),
+                "Anteile (Ausschüttend)": np.asarray(ledger_shares_no),
+                "Dividende Netto (Ausschüttend)": np.asarray(ledger_divs_net_no),
+                "Wert (Ausschüttend)": np.asarray(port_vals_no_reinv),
+                "Cashflow IZF (Ausschüttend)": np.asarray(cashflows_no_reinv),
+                "Anteile (Thesaurierend)": np.asarray(ledger_shares_re),
+                "Dividende Netto (Thesaurierend)": np.asarray(ledger_divs_net_re),
+                "Wert (Thesaurierend)": np.asarray(port_vals_reinv),
+                "Cashflow IZF (Thesaurierend)": np.asarray(cashflows_reinv),
+            }),
+            "Jahreshistorie": ("jahreshistorie", {
+                "Jahr": np.fromiter(yearly_stats.keys(), dtype=np.int64, count=len(yearly_stats)),
+                **{
+                    col_name: np.fromiter((stats[stat_key] for stats in yearly_stats.values()), dtype=np.float64, count=len(yearly_stats))
+                    for stat_key, col_name in [
+                        ("Start_No", "Startkapital (Ausschüttend)"), ("End_No", "Endkapital (Ausschüttend)"), ("Div_No", "Dividende Netto (Ausschüttend)"),
+                        ("Start_Re", "Startkapital (Thesaurierend)"), ("End_Re", "Endkapital (Thesaurierend)"), ("Div_Re", "Reinvestiert Netto (Thesaurierend)"),
+                    ]
+                },
+            }),
+        }
+
+        if total_divs_net_no_reinv > 0:
+            cal_years, cal_idx = np.unique(df_filtered.index.year.to_numpy(), return_inverse=True)
+            cal_months = df_filtered.index.month.to_numpy() - 1
+            for label, slug, div_values in [
+                ("Dividenden Kalender (Ausschüttend)", "dividenden_ausschuettend", ledger_divs_net_no),
+                ("Dividenden Kalender (Thesaurierend)", "dividenden_thesaurierend", ledger_divs_net_re),
+            ]:
+                cal = np.zeros((len(cal_years), 12))
+                np.add.at(cal, (cal_idx, cal_months), np.asarray(div_values))
+                cal_columns = {"Jahr": cal_years.astype(np.int64)}
+                cal_columns.update({m: cal[:, i] for i, m in enumerate(monate_order)})
+                cal_columns["Gesamt"] = cal.sum(axis=1)
+                export_tables[label] = (slug, cal_columns)
+
+        bench_cols = [b for b in benchmarks if b in chart_df.columns]
+        if bench_cols:
+            export_tables["Benchmarks"] = ("benchmarks", {
+                "Datum": export_dates,
+                "Eingezahltes Kapital": np.asarray(invested_values_brutto),
+                **{b: chart_df[b].to_numpy(dtype=np.float64) for b in bench_cols},
+            })
+
+        # Merkt sich den Klick nur für die aktuellen Parameter, damit nach Änderungen erst erneut geklickt werden muss
+        export_params = (
+            selected_ticker, start_capital, monthly_rate, fee_type, fee_value, tax_rate,
+            start_date.isoformat(), end_date.isoformat(), tuple(bench_cols)
+        )
+
+        col_e1, col_e2, col_e3 = st.columns([2, 2, 1])
+        export_table = col_e1.selectbox("Tabelle", list(export_tables.keys()), key=f"export_table_{safe_ticker}")
+        export_format = col_e2.radio("Format", list(EXPORT_FORMATS.keys()), horizontal=True, key=f"export_format_{safe_ticker}")
+        export_request = (export_params, export_table, export_format)
+
+        col_e3.write("")
+        if col_e3.button("Datei erstellen", key=f"export_build_{safe_ticker}", width="stretch"):
+            st.session_state.export_request = export_request
+
+        if st.session_state.get("export_request") == export_request:
+            slug, columns = export_tables[export_table]
+            ext, mime = EXPORT_FORMATS[export_format]
+            try:
+                with st.spinner("Erstelle Datei..."):
+                    file_data = build_export_file(export_table, export_format, columns)
+                st.download_button(
+                    f"⬇️ {export_table} herunterladen ({ext.upper()})",
+                    data=file_data,
+                    file_name=f"{selected_ticker}_{slug}_{start_date:%Y%m%d}_{end_date:%Y%m%d}.{ext}",
+                    mime=mime,
+                    key=f"export_download_{safe_ticker}",
+                    width="stretch"
+                )
+            except ImportError as e:
+                st.error(f"Für dieses Format fehlt ein Paket: {e.name}")
+
+        # =====================================================================
+        # PARAMETER-SWEEP & SENSITIVITÄTS-HEATMAPS
+        # =====================================================================
+        st.markdown("---")
+        st.subheader("🧮 Parameter-Sweep (Sensitivität)")
+        st.write("Berechnet alle Kombinationen aus Gebühr, Steuersatz, Sparrate und Startkapital auf dem gewählten Kursverlauf und zeigt, wie empfindlich Endkapital und IZF auf die Parameter reagieren.")
+
+        def sweep_range(label, default_min, default_max, default_steps, step, key, max_value=None):
+            c_label, c_min, c_max, c_steps = st.columns([2, 2, 2, 1])
+            c_label.markdown(f"**{label}**")
+            v_min = c_min.number_input("Von", min_value=0.0, max_value=max_value, value=float(default_min), step=step, key=f"sweep_min_{key}_{safe_ticker}")
+            v_max = c_max.number_input("Bis", min_value=0.0, max_value=max_value, value=float(default_max), step=step, key=f"sweep_max_{key}_{safe_ticker}")
+            n_steps = c_steps.number_input("Stufen", min_value=1, max_value=50, value=default_steps, step=1, key=f"sweep_steps_{key}_{safe_ticker}")
+            # Runden, damit glatte Stufen (z. B. 1,5 %) exakt getroffen werden
+            return tuple(float(v) for v in np.unique(np.round(np.linspace(v_min, max(v_min, v_max), int(n_steps)), 6)))
+
+        with st.expander("Raster festlegen", expanded=False):
+            # Standardraster mit glatten Stufen, die die Standardwerte der Sidebar enthalten
+            sweep_fee_pct = sweep_range("Gebühr (%)", 0.0, 2.85, 20, 0.15, "fee_pct", max_value=100.0)
+            sweep_fee_abs = sweep_range("Gebühr (€)", 0.0, 4.75, 20, 0.25, "fee_abs")
+            sweep_tax = sweep_range("Steuerpauschale (%)", 0.0, 47.5, 20, 2.5, "tax", max_value=100.0)
+            sweep_rate = sweep_range("Sparrate (€)", 100.0, 1000.0, 10, 100.0, "rate")
+            sweep_cap = sweep_range("Startkapital (€)", 0.0, 45000.0, 10, 5000.0, "cap")
+
+        n_scenarios = (len(sweep_fee_pct) + len(sweep_fee_abs)) * len(sweep_tax) * len(sweep_rate) * len(sweep_cap)
+        sweep_request = (selected_ticker, start_date.isoformat(), end_date.isoformat(), str(df_filtered.index[-1]),
+                         sweep_fee_pct, sweep_fee_abs, sweep_tax, sweep_rate, sweep_cap)
+
+        if n_scenarios > SWEEP_MAX_SCENARIOS:
+            st.warning(f"Zu viele Szenarien ({n_scenarios:,}). Bitte das Raster auf maximal {SWEEP_MAX_SCENARIOS:,} Szenarien verkleinern.")
+        elif st.button(f"▶️ Sweep starten ({n_scenarios:,} Szenarien)", key=f"sweep_run_{safe_ticker}"):
+            st.session_state.sweep_request = sweep_request
+
+        if st.session_state.get("sweep_request") == sweep_request:
+            sweep_prices = df_filtered['Close'].to_numpy(dtype=np.float64)
+            sweep_divs = df_filtered['Dividends'].to_numpy(dtype=np.float64)
+            with st.spinner("Berechne Szenarien..."):
+                sweep_results = {
+                    "Prozentual (%)": run_parameter_sweep(sweep_prices, sweep_divs, "Prozentual (%)", sweep_fee_pct, sweep_tax, sweep_rate, sweep_cap),
+                    "Absolut (€)": run_parameter_sweep(sweep_prices, sweep_divs, "Absolut (€)", sweep_fee_abs, sweep_tax, sweep_rate, sweep_cap),
+                }
+            sweep_fee_levels = {"Prozentual (%)": sweep_fee_pct, "Absolut (€)": sweep_fee_abs}
+
+            sweep_metrics = {
+                "Endkapital (Thesaurierend)": ("end_re", "€"),
+                "Endkapital (Ausschüttend)": ("end_no", "€"),
+                "IZF p.a. (Thesaurierend)": ("irr_re", "%"),
+                "IZF p.a. (Ausschüttend)": ("irr_no", "%"),
+            }
+            sweep_dims = ["Gebühr", "Steuerpauschale (%)", "Sparrate (€)", "Startkapital (€)"]
+
+            def nearest_level(levels, value):
+                return levels[int(np.argmin(np.abs(np.asarray(levels) - value)))]
+
+            # --- HEATMAP: ZWEI PARAMETER GEGENEINANDER ---
+            st.write("### Sensitivitäts-Heatmap")
+            c_h1, c_h2, c_h3, c_h4 = st.columns(4)
+            hm_metric = c_h1.selectbox("Kennzahl", list(sweep_metrics.keys()), key=f"sweep_metric_{safe_ticker}")
+            hm_fee_type = c_h2.radio("Art der Gebühr", list(sweep_results.keys()), index=0 if fee_type == "Prozentual (%)" else 1, horizontal=True, key=f"sweep_feetype_{safe_ticker}")
+            hm_x = c_h3.selectbox("X-Achse", sweep_dims, index=2, key=f"sweep_x_{safe_ticker}")
+            hm_y = c_h4.selectbox("Y-Achse", [dim for dim in sweep_dims if dim != hm_x], index=0, key=f"sweep_y_{safe_ticker}")
+
+            metric_key, metric_unit = sweep_metrics[hm_metric]
+            dim_levels = [sweep_fee_levels[hm_fee_type], sweep_tax, sweep_rate, sweep_cap]
+            dim_current = [fee_value, tax_rate, monthly_rate, start_capital]
+            dim_labels = [f"Gebühr ({hm_fee_type.split('(')[-1]}"] + sweep_dims[1:]
+
+            # Nicht gewählte Dimensionen auf einen Wert fixieren
+            fixed_cols = st.columns(2)
+            index = []
+            fixed_slot = 0
+            for i, dim in enumerate(sweep_dims):
+                if dim in (hm_x, hm_y):
+                    index.append(slice(None))
+                else:
+                    fixed_val = fixed_cols[fixed_slot].select_slider(
+                        dim_labels[i], options=dim_levels[i], value=nearest_level(dim_levels[i], dim_current[i]),
+                        format_func=lambda v: f"{v:,.2f}", key=f"sweep_fix_{i}_{hm_fee_type}_{safe_ticker}"
+                    )
+                    index.append(dim_levels[i].index(fixed_val))
+                    fixed_slot += 1
+
+            x_i, y_i = sweep_dims.index(hm_x), sweep_dims.index(hm_y)
+            z = sweep_results[hm_fee_type][metric_key][tuple(index)]
+            if x_i < y_i:
+                z = z.T
+            if metric_unit == "%" and np.isnan(z).any():
+                st.info("Leere Felder: Für diese Szenarien existiert kein IZF (z. B. ohne Einzahlungen oder ohne Vorzeichenwechsel der Cashflows).")
+
+            fig_hm = go.Figure(go.Heatmap(
+                x=dim_levels[x_i], y=dim_levels[y_i], z=z, colorscale="Viridis",
+                colorbar=dict(title=metric_unit),
+                hovertemplate=f"{dim_labels[x_i]}: %{{x:,.2f}}<br>{dim_labels[y_i]}: %{{y:,.2f}}<br><b>{hm_metric}</b>: %{{z:,.2f}} {metric_unit}<extra></extra>"
+            ))
+            fig_hm.update_layout(
+                template="plotly_dark", height=550, separators=',.', margin=dict(l=0, r=0, t=30, b=0),
+                xaxis_title=dim_labels[x_i], yaxis_title=dim_labels[y_i]
+            )
+            st.plotly_chart(fig_hm, width="stretch")
+
+            # --- BREAK-EVEN: PROZENTUALE GEBÜHR VS. FIXGEBÜHR ---
+            st.write("### Prozentual vs. Fixgebühr")
+            st.write("Differenz der Kennzahl (Fixgebühr minus prozentuale Gebühr) je Sparrate. Im roten Bereich ist die Fixgebühr teurer, die Linie markiert die Fixgebühr, ab der die prozentuale Gebühr günstiger wird.")
+            c_b1, c_b2, c_b3 = st.columns(3)
+            be_pct = c_b1.select_slider("Prozentuale Gebühr (%)", options=sweep_fee_pct, value=nearest_level(sweep_fee_pct, 1.5), format_func=lambda v: f"{v:,.2f}", key=f"sweep_be_pct_{safe_ticker}")
+            be_tax = c_b2.select_slider("Steuerpauschale (%)", options=sweep_tax, value=nearest_level(sweep_tax, tax_rate), format_func=lambda v: f"{v:,.2f}", key=f"sweep_be_tax_{safe_ticker}")
+            be_cap = c_b3.select_slider("Startkapital (€)", options=sweep_cap, value=nearest_level(sweep_cap, start_capital), format_func=lambda v: f"{v:,.2f}", key=f"sweep_be_cap_{safe_ticker}")
+
+            t_i, c_i = sweep_tax.index(be_tax), sweep_cap.index(be_cap)
+            pct_line = sweep_results["Prozentual (%)"][metric_key][sweep_fee_pct.index(be_pct), t_i, :, c_i]
+            abs_grid = sweep_results["Absolut (€)"][metric_key][:, t_i, :, c_i]
+            diff = abs_grid - pct_line[None, :]
+
+            # Fixgebühr mit Differenz 0 je Sparrate (Differenz fällt mit steigender Fixgebühr)
+            break_even = [
+                float(np.interp(0.0, diff[::-1, r_i], np.asarray(sweep_fee_abs)[::-1])) if diff[:, r_i].min() <= 0 <= diff[:, r_i].max() else None
+                for r_i in range(len(sweep_rate))
+            ]
+
+            fig_be = go.Figure(go.Heatmap(
+                x=sweep_rate, y=sweep_fee_abs, z=diff, colorscale="RdYlGn", zmid=0,
+                colorbar=dict(title=metric_unit),
+                hovertemplate=f"Sparrate: %{{x:,.2f}} €<br>Fixgebühr: %{{y:,.2f}} €<br><b>Differenz</b>: %{{z:+,.2f}} {metric_unit}<extra></extra>"
+            ))
+            fig_be.add_trace(go.Scatter(
+                x=sweep_rate, y=break_even, mode='lines+markers', name=f"Break-even zu {be_pct:,.2f} %",
+                line=dict(color="#00FFFF", width=2),
+                hovertemplate='Break-even: %{y:,.2f} €<extra></extra>'
+            ))
+            fig_be.update_layout(
+                template="plotly_dark", height=550, separators=',.', margin=dict(l=0, r=0, t=30, b=0),
+                xaxis_title="Sparrate (€)", yaxis_title="Fixgebühr (€)",
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0)
+            )
+            st.plotly_chart(fig_be, width="stretch")